@@ -1,3 +1,4 @@
 from ._neval import neval, neval_file
+from .executor import NevalExecutor, subinterpreters_supported
 from . import util
 from . import flagged_dict
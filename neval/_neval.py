@@ -1,12 +1,15 @@
+import __future__
 import ast
 import hashlib
 import linecache
 import tempfile
+import tokenize
+from collections import OrderedDict
 from collections.abc import Mapping
 from contextlib import suppress
 from pathlib import Path
-from types import SimpleNamespace
-from typing import Union, Optional, Any
+from types import CodeType, SimpleNamespace
+from typing import Union, Optional, Any, Iterable, Tuple
 import re
 from .flagged_dict import FlaggedDict
 from .util import (
@@ -14,17 +17,25 @@ from .util import (
     add_asignment_to_last_statement,
     deepest_traceback,
     format_code_for_error_line_display,
+    inline_constants,
+    iter_top_level_chunks,
+    shift_code_lineno,
 )
 
 reg_neval_filename = re.compile(r"neval-[0-9a-f]{40}")
 neval_filename_cache = {}
 
+# Least recently used cache of code specialized for frozen constants
+specialized_code_cache = OrderedDict()
+specialized_code_cache_size = 256
+
 
 def neval(
     code: Union[str, ast.Module],
     namespace: Optional[Union[Mapping, SimpleNamespace, Any]] = None,
     namespace_readonly: Optional[Union[Mapping, SimpleNamespace, Any]] = None,
     traceback_file_output: bool = True,
+    frozen: Union[bool, str, Iterable[str]] = False,
 ) -> Any:
     """
     Execute Python code in a namespace and return the result of the last statement in the code.
@@ -39,6 +50,10 @@ def neval(
             occurs in order for the Python stacktrace to print all relevant lines. Ideally this should be mocked in
             memory, but it seems like there are some redundancies in the interpreter that doesn't make this process
             easy. This might cause security issues. Defaults to `True`.
+        frozen (Union[bool, str, Iterable[str]], optional): Treat all (`True`) or the given name(s) of
+            `namespace_readonly` as constants: their scalar values are inlined into the compiled code, which is cached
+            and reused for as long as the inlined values are not rebound. Names that the code binds itself are never
+            inlined. Only applies when `code` is a string. Defaults to `False`.
 
 
     Returns:
@@ -71,16 +86,21 @@ def neval(
     # Set up the AST node
     runme = code
 
+    if frozen and isinstance(code, str):
+        with suppress(SyntaxError):
+            runme, var_return = _specialize(code, filename, get_namespace_mapping(namespace_readonly), frozen)
+
     # If a syntax error occurs, rather raise it at the exec line
-    with suppress(SyntaxError):
-        if not isinstance(runme, ast.AST):
-            runme = ast.parse(runme)
+    if not isinstance(runme, CodeType):
+        with suppress(SyntaxError):
+            if not isinstance(runme, ast.AST):
+                runme = ast.parse(runme)
 
-        add_asignment_to_last_statement(runme, var_return)
+            add_asignment_to_last_statement(runme, var_return)
 
     # Execute the annotated AST node
     try:
-        exec(compile(runme, filename, "exec"), ns_exec)
+        exec(runme if isinstance(runme, CodeType) else compile(runme, filename, "exec"), ns_exec)
 
     # If an error occurs, display it properly
     except Exception as e:
@@ -107,7 +127,9 @@ def neval(
         if traceback_file_output and isinstance(code, str):
             for fname in Path(tempfile.gettempdir()).glob("neval-*"):
                 if reg_neval_filename.match(fname.name) and fname.name not in neval_filename_cache:
-                    fname.unlink()
+                    # Another process may have removed it already
+                    with suppress(FileNotFoundError):
+                        fname.unlink()
 
             Path(filename).write_text(code)
 
@@ -129,10 +151,44 @@ def neval(
     return return_value
 
 
+def _specialize(
+    code: str, filename: str, readonly: Mapping, frozen: Union[bool, str, Iterable[str]]
+) -> Tuple[CodeType, str]:
+    # A single name, not the set of its characters
+    if isinstance(frozen, str):
+        frozen = (frozen,)
+
+    frozen_names = readonly if frozen is True else frozenset(frozen)
+    key = (code, filename, True if frozen is True else frozen_names)
+
+    # Reuse the cached code for as long as none of the inlined values have been rebound
+    if (cached := specialized_code_cache.get(key)) is not None:
+        code_object, var_return, inlined = cached
+        if all(readonly.get(k, inlined) is v for k, v in inlined.items()):
+            specialized_code_cache.move_to_end(key)
+            return code_object, var_return
+
+    tree = ast.parse(code)
+    inlined = inline_constants(tree, readonly, frozen_names)
+
+    var_return = gen_sym("return")
+    add_asignment_to_last_statement(tree, var_return)
+
+    code_object = compile(tree, filename, "exec")
+    specialized_code_cache[key] = (code_object, var_return, inlined)
+    specialized_code_cache.move_to_end(key)
+    while len(specialized_code_cache) > specialized_code_cache_size:
+        specialized_code_cache.popitem(last=False)
+
+    return code_object, var_return
+
+
 def neval_file(
     filepath: Union[Path, str],
     namespace: Optional[Union[Mapping, SimpleNamespace, Any]] = None,
     namespace_readonly: Optional[Union[Mapping, SimpleNamespace, Any]] = None,
+    chunked: bool = False,
+    resume_from_line: int = 1,
 ) -> Any:
     """
     Execute Python code from a file in a namespace and return the result of the last statement in the file.
@@ -143,6 +199,13 @@ def neval_file(
             any object with a `__dict__` attribute such as `SimpleNamespace`. Defaults to `None`.
         namespace_readonly (Union[Mapping, Any], optional): A namespace to execute the code in, this can
             either be a `dict` or any object with a `__dict__` attribute such as `SimpleNamespace`. Defaults to `None`.
+        chunked (bool, optional): Stream the file as chunks of top-level statements, each compiled right before it
+            runs, instead of parsing and compiling the whole file up front. This keeps memory low and starts
+            execution immediately for very large files. Statements before a failing chunk have already run, and the
+            raised exception gets a `neval_resume_line` attribute with the first line of the failing chunk. Defaults
+            to `False`.
+        resume_from_line (int, optional): In `chunked` mode, skip the chunks that end before this line, e.g. to resume
+            from `neval_resume_line` with the namespace of a previous failed call. Defaults to `1`.
 
     Returns:
         Any: The result of the last statement in the code. If that statement is not an expression None is returned.
@@ -166,18 +229,20 @@ def neval_file(
     var_return = gen_sym("return")
 
     # Set up the AST node
-    runme = Path(filepath).read_text()
+    if not chunked:
+        runme = Path(filepath).read_text()
 
-    # If a syntax error occurs, rather raise it at the exec line
-    with suppress(SyntaxError):
-        if not isinstance(runme, ast.AST):
+        # If a syntax error occurs, rather raise it at the exec line
+        with suppress(SyntaxError):
             runme = ast.parse(runme)
+            add_asignment_to_last_statement(runme, var_return)
 
-        add_asignment_to_last_statement(runme, var_return)
-
-    # Execute the annotated AST node
+    # Execute the annotated AST node, or stream the file chunk by chunk
     try:
-        exec(compile(runme, str(filepath), "exec"), ns_exec)
+        if chunked:
+            _exec_chunks(filepath, ns_exec, var_return, resume_from_line)
+        else:
+            exec(compile(runme, str(filepath), "exec"), ns_exec)
 
     # Even if an error occurs, ensure that mutated scope is reflected in the namespace
     finally:
@@ -191,3 +256,105 @@ def neval_file(
             nspace[key] = ns_exec[key]
 
     return return_value
+
+
+def _exec_chunks(filepath: Path, ns_exec: FlaggedDict, var_return: str, resume_from_line: int) -> None:
+    filename = str(filepath)
+    flags = 0
+    future_allowed = True
+
+    with tokenize.open(filepath) as f:
+        chunks = iter_top_level_chunks(f.readline)
+        next_chunk = next(chunks, None)
+        while next_chunk is not None:
+            (first_lineno, chunk), next_chunk = next_chunk, next(chunks, None)
+            last_lineno = first_lineno + chunk.count("\n") - chunk.endswith("\n")
+
+            # `from __future__` imports can only lead the file, and then apply to all later chunks, skipped or not
+            if future_allowed:
+                future_allowed, chunk_flags = _leading_future_flags(chunk, docstring_allowed=first_lineno == 1)
+                flags |= chunk_flags
+
+            if last_lineno < resume_from_line:
+                continue
+
+            try:
+                if not future_allowed and "__future__" in chunk:
+                    _check_no_future_imports(chunk, filename, first_lineno)
+
+                try:
+                    code = None if next_chunk is None else compile(chunk, filename, "exec", flags, dont_inherit=True)
+
+                    # Only the last chunk needs an AST in order to capture the return value, other chunks only if
+                    # a leading string literal would otherwise become the module docstring and rebind `__doc__`
+                    if code is None or (first_lineno > 1 and "__doc__" in code.co_names):
+                        tree = compile(chunk, filename, "exec", ast.PyCF_ONLY_AST | flags, dont_inherit=True)
+                        if first_lineno > 1 and tree.body and _is_string_expression(tree.body[0]):
+                            tree.body.insert(0, ast.copy_location(ast.Pass(), tree.body[0]))
+                        if next_chunk is None:
+                            add_asignment_to_last_statement(tree, var_return)
+                        code = compile(tree, filename, "exec", flags, dont_inherit=True)
+                        del tree
+
+                except SyntaxError as e:
+                    # The compiler reads the error line from `filename`, which doesn't line up with the chunk
+                    if e.lineno is not None:
+                        with suppress(IndexError):
+                            e.text = chunk.splitlines(keepends=True)[e.lineno - 1]
+                        e.lineno += first_lineno - 1
+                    if getattr(e, "end_lineno", None) is not None:
+                        e.end_lineno += first_lineno - 1
+                    raise
+
+                exec(shift_code_lineno(code, first_lineno - 1), ns_exec)
+
+            except Exception as e:
+                e.neval_resume_line = first_lineno
+
+                # Python 3.11 has new functionality to display traceback notes
+                if hasattr(e, "add_note"):
+                    lineno = e.lineno if isinstance(e, SyntaxError) else None
+                    if lineno is None:
+                        if tb_last := deepest_traceback(e.__traceback__, filename):
+                            lineno = tb_last.tb_lineno
+                    if lineno is not None and first_lineno <= lineno <= last_lineno:
+                        e.add_note(format_code_for_error_line_display(chunk, lineno, filename, first_lineno))
+
+                raise
+
+
+def _is_string_expression(node: ast.stmt) -> bool:
+    return isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)
+
+
+def _leading_future_flags(chunk: str, docstring_allowed: bool) -> Tuple[bool, int]:
+    # Return whether later chunks may still hold `from __future__` imports, and the compiler flags of those in `chunk`
+    flags = 0
+    try:
+        tree = ast.parse(chunk)
+    except SyntaxError:
+        return False, flags
+
+    for i, node in enumerate(tree.body):
+        if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+            for alias in node.names:
+                flags |= getattr(getattr(__future__, alias.name, None), "compiler_flag", 0)
+        elif not (docstring_allowed and i == 0 and _is_string_expression(node)):
+            return False, flags
+
+    return True, flags
+
+
+def _check_no_future_imports(chunk: str, filename: str, first_lineno: int) -> None:
+    # Each chunk is compiled as its own module, so the compiler can't tell that these come after other statements
+    try:
+        tree = ast.parse(chunk)
+    except SyntaxError:
+        return  # Reported by `compile` instead
+
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+            raise SyntaxError(
+                "from __future__ imports must occur at the beginning of the file",
+                (filename, node.lineno + first_lineno - 1, node.col_offset + 1, chunk.splitlines()[node.lineno - 1]),
+            )
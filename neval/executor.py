@@ -0,0 +1,214 @@
+from __future__ import annotations
+import ast
+import pickle
+import traceback
+from collections.abc import Mapping
+from concurrent.futures import Future, ProcessPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ._neval import neval
+
+try:
+    # Python >= 3.14 ships a public executor for per-interpreter-GIL subinterpreters (PEP 684/734)
+    from concurrent.futures import InterpreterPoolExecutor
+except ImportError:
+    InterpreterPoolExecutor = None
+
+_SHAREABLE_SCALARS = (type(None), bool, int, float, complex, str, bytes)
+
+
+def subinterpreters_supported() -> bool:
+    """
+    Return `True` if this Python can run `neval` in isolated subinterpreters, otherwise `NevalExecutor` falls back to
+    worker processes.
+    """
+    return InterpreterPoolExecutor is not None
+
+
+def to_shareable(value: Any) -> Any:
+    """
+    Convert `value` to something that can be handed over to another interpreter, or raise `TypeError` if it can't.
+
+    Scalars, `str` and `bytes` are passed as is, a `bytearray` is copied, a `memoryview` is passed as (read-only)
+    `bytes`, and `tuple`, `list` and `dict` containers are copied recursively. Subclasses of these types (e.g.
+    `IntEnum` or `numpy.float64`) are converted to their base type, since their defining module might not be
+    importable in the other interpreter.
+    """
+    if type(value) in _SHAREABLE_SCALARS:
+        return value
+    if isinstance(value, memoryview):
+        return bytes(value)
+    if isinstance(value, (tuple, list)):
+        return (tuple if isinstance(value, tuple) else list)(to_shareable(i) for i in value)
+    if isinstance(value, dict):
+        return {to_shareable(k): to_shareable(v) for k, v in value.items()}
+    for base in _SHAREABLE_SCALARS + (bytearray,):
+        if isinstance(value, base):
+            return base(value)
+
+    raise TypeError(f"Object of type {type(value).__name__} cannot be shared between interpreters")
+
+
+def shareable_items(mapping: Mapping) -> Dict[str, Any]:
+    """
+    Return the items of `mapping` that can be handed over to another interpreter, silently dropping the rest.
+    """
+    shared = {}
+    for key, value in mapping.items():
+        try:
+            shared[key] = to_shareable(value)
+        except TypeError:
+            pass
+
+    return shared
+
+
+def _equal(a: Any, b: Any) -> bool:
+    try:
+        return type(a) is type(b) and bool(a == b)
+    except Exception:
+        return False
+
+
+def _picklable_exception(exception: Exception) -> Exception:
+    # Exceptions travel back through pickle, which fails for e.g. exception classes defined by the code itself
+    try:
+        pickle.loads(pickle.dumps(exception))
+        return exception
+    except Exception:
+        tb = "".join(traceback.format_exception(type(exception), exception, exception.__traceback__))
+        return RuntimeError(f"{type(exception).__name__}: {exception}\n\n{tb}")
+
+
+def _neval_worker(
+    code: Union[str, ast.Module],
+    namespace: Dict[str, Any],
+    namespace_readonly: Dict[str, Any],
+    traceback_file_output: bool,
+) -> Tuple[Any, Optional[Exception], Dict[str, Any], List[str]]:
+    # This runs inside the worker interpreter, only shareable values may travel back. The snapshot is a deep copy so
+    # that in-place changes to containers show up in the delta.
+    before = to_shareable(namespace)
+    return_value = exception = None
+
+    try:
+        return_value = to_shareable(neval(code, namespace, namespace_readonly, traceback_file_output))
+    except Exception as e:
+        exception = _picklable_exception(e)
+
+    # Like `neval`, the mutated scope is reflected in the namespace even if an error occurs
+    finally:
+        after = shareable_items(namespace)
+        changed = {k: v for k, v in after.items() if k not in before or not _equal(before[k], v)}
+        removed = [k for k in before if k not in namespace]
+
+    return return_value, exception, changed, removed
+
+
+class NevalExecutor:
+    """
+    Run `neval` calls in parallel, each in its own isolated interpreter.
+
+    On Python >= 3.14 every worker is a subinterpreter with its own GIL, which is far cheaper to start and keep around
+    than a process while still scaling across cores. On older interpreters the executor falls back to worker processes
+    with the same semantics.
+
+    Only shareable values (see `to_shareable`) cross the interpreter boundary: other values in `namespace` and
+    `namespace_readonly` are not visible to the code, and the code's return value must be shareable. Once a call
+    completes, even with an error, the changes it made to the shareable part of `namespace` are applied to the caller's
+    `namespace`.
+
+    Example:
+        with NevalExecutor() as executor:
+            futures = [executor.submit(code, ns, readonly) for code, ns in jobs]
+            results = [f.result() for f in futures]
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        if subinterpreters_supported():
+            self._executor = InterpreterPoolExecutor(max_workers=max_workers)
+        else:
+            self._executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    @property
+    def isolated_by_subinterpreters(self) -> bool:
+        return InterpreterPoolExecutor is not None and isinstance(self._executor, InterpreterPoolExecutor)
+
+    def submit(
+        self,
+        code: Union[str, ast.Module],
+        namespace: Optional[Union[Mapping, SimpleNamespace, Any]] = None,
+        namespace_readonly: Optional[Union[Mapping, SimpleNamespace, Any]] = None,
+        traceback_file_output: bool = False,
+    ) -> Future:
+        """
+        Schedule `neval(code, namespace, namespace_readonly)` in a worker interpreter.
+
+        Args:
+            code (Union[str, ast.Module]): The code to execute.
+            namespace (Union[Mapping, Any], optional): The namespace to execute the code in, this can either be a `dict`
+                or any object with a `__dict__` attribute such as `SimpleNamespace`. It is updated with the changes
+                made by the code before the returned future resolves. Defaults to `None`.
+            namespace_readonly (Union[Mapping, Any], optional): A read-only namespace to execute the code in, this can
+                either be a `dict` or any object with a `__dict__` attribute such as `SimpleNamespace`. Defaults to
+                `None`.
+            traceback_file_output (bool, optional): See `neval`. Defaults to `False`, since the workers share the
+                temporary directory.
+
+        Returns:
+            Future: A future holding the result of the last statement in the code.
+
+        """
+
+        def get_namespace_mapping(x):
+            return {} if x is None else x if isinstance(x, Mapping) else x.__dict__
+
+        nspace = get_namespace_mapping(namespace)
+
+        inner = self._executor.submit(
+            _neval_worker,
+            code,
+            shareable_items(nspace),
+            shareable_items(get_namespace_mapping(namespace_readonly)),
+            traceback_file_output,
+        )
+
+        # Apply the namespace delta before anyone waiting on the future can observe the result
+        outer = Future()
+
+        def forward_cancel(f: Future):
+            if f.cancelled():
+                inner.cancel()
+
+        def apply_delta(f: Future):
+            # A cancelled call must not touch the namespace, even if the worker already ran it
+            if not outer.set_running_or_notify_cancel():
+                return
+
+            try:
+                return_value, exception, changed, removed = f.result()
+                for key in removed:
+                    nspace.pop(key, None)
+                nspace.update(changed)
+
+                if exception is not None:
+                    outer.set_exception(exception)
+                else:
+                    outer.set_result(return_value)
+
+            except BaseException as e:
+                outer.set_exception(e)
+
+        outer.add_done_callback(forward_cancel)
+        inner.add_done_callback(apply_delta)
+        return outer
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> NevalExecutor:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.shutdown(wait=True)
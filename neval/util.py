@@ -1,7 +1,19 @@
 import ast
+import tokenize
 import uuid
 from pathlib import Path
-from types import SimpleNamespace
+from types import CodeType, SimpleNamespace
+from typing import Any, Callable, Container, Dict, Iterator, Mapping, Set, Tuple
+
+# Keywords that continue a compound statement at the top level instead of starting a new one
+continuation_keywords = {"else", "elif", "except", "finally"}
+
+# Pattern matching (Python >= 3.10) and type parameter (Python >= 3.12) nodes that bind their `name`
+named_binding_nodes = tuple(
+    getattr(ast, name)
+    for name in ("MatchAs", "MatchStar", "TypeVar", "ParamSpec", "TypeVarTuple")
+    if hasattr(ast, name)
+)
 
 
 def gen_sym(varname):
@@ -23,13 +35,76 @@ def add_asignment_to_last_statement(code: ast.Module, varname: str):
         code.body[-1] = assign
 
 
-def format_code_for_error_line_display(code: str, lineno: int, filename: str):
+def is_inlinable_constant(value: Any) -> bool:
+    if type(value) is tuple:
+        return all(is_inlinable_constant(i) for i in value)
+
+    return type(value) in (type(None), bool, int, float, complex, str, bytes)
+
+
+def bound_names(code: ast.AST) -> Set[str]:
+    """
+    Return all names that are bound, deleted or declared `global`/`nonlocal` anywhere in `code`, in any scope.
+    """
+    names = set()
+    for node in ast.walk(code):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.alias):
+            names.add(node.asname or node.name.split(".")[0])
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        elif isinstance(node, named_binding_nodes) and node.name:
+            names.add(node.name)
+        elif isinstance(node, getattr(ast, "MatchMapping", ())) and node.rest:
+            names.add(node.rest)
+
+    return names
+
+
+def inline_constants(code: ast.Module, constants: Mapping, names: Container[str]) -> Dict[str, Any]:
+    """
+    Replace every load of a name in `names` by its value from `constants`, as long as the value is a constant and the
+    name isn't bound anywhere in `code`. CPython's compiler then folds the resulting constant expressions.
+
+    Returns the inlined names and values, these must still be identical for the specialized code to be valid.
+    """
+    shadowed = bound_names(code)
+    inlined = {}
+
+    class Inliner(ast.NodeTransformer):
+        def visit_Name(self, node: ast.Name):
+            if (
+                isinstance(node.ctx, ast.Load)
+                and node.id not in shadowed
+                and node.id in names
+                and node.id in constants
+                and is_inlinable_constant(value := constants[node.id])
+            ):
+                inlined[node.id] = value
+                return ast.copy_location(ast.Constant(value), node)
+
+            return node
+
+    Inliner().visit(code)
+    return inlined
+
+
+def format_code_for_error_line_display(code: str, lineno: int, filename: str, first_lineno: int = 1):
     lineno = int(lineno)
     strlineno = str(lineno)
 
     lines = code.splitlines()
-    lines_annotated = [f"{i+1:7d} {line}" for i, line in enumerate(lines)]
-    lines_annotated[lineno - 1] = ("-") * (5 - len(strlineno)) + "> " + strlineno + " " + lines[lineno - 1]
+    lines_annotated = [f"{i+first_lineno:7d} {line}" for i, line in enumerate(lines)]
+    lines_annotated[lineno - first_lineno] = (
+        ("-") * (5 - len(strlineno)) + "> " + strlineno + " " + lines[lineno - first_lineno]
+    )
     return "\n".join([f"Error in {Path(filename).name}:"] + lines_annotated)
 
 
@@ -42,3 +117,74 @@ def deepest_traceback(traceback, filename):
             tb_find = pointer
 
     return tb_find
+
+
+def shift_code_lineno(code: CodeType, n: int) -> CodeType:
+    """
+    Shift the line numbers of `code` and all nested code objects down by `n` lines. Line tables are stored relative
+    to `co_firstlineno`, so this is much cheaper than `ast.increment_lineno` followed by a compile.
+    """
+    if n == 0:
+        return code
+
+    return code.replace(
+        co_firstlineno=code.co_firstlineno + n,
+        co_consts=tuple(shift_code_lineno(c, n) if isinstance(c, CodeType) else c for c in code.co_consts),
+    )
+
+
+def iter_top_level_chunks(readline: Callable[[], str]) -> Iterator[Tuple[int, str]]:
+    """
+    Lazily split Python source into chunks of whole top-level statements without parsing the full module.
+
+    Yields `(first_lineno, source)` tuples, where `first_lineno` is the 1-based line number of the chunk's first line
+    in the original source. Decorators stay with their definition and `else`/`elif`/`except`/`finally` clauses stay
+    with their compound statement. If the source can't be tokenized, the remainder is yielded as one chunk so that
+    `compile` can report the error.
+    """
+    lines = []  # Lines read but not yet yielded
+    first_lineno = 1  # Line number of lines[0]
+
+    def recording_readline():
+        line = readline()
+        lines.append(line)
+        return line
+
+    def pop_chunk(up_to_lineno):
+        nonlocal first_lineno
+        n = up_to_lineno - first_lineno + 1
+        chunk = (first_lineno, "".join(lines[:n]))
+        del lines[:n]
+        first_lineno = up_to_lineno + 1
+        return chunk
+
+    depth = 0
+    at_line_start = True
+    in_decorator = False
+    has_statement = False
+
+    try:
+        for tok in tokenize.generate_tokens(recording_readline):
+            if tok.type == tokenize.INDENT:
+                depth += 1
+            elif tok.type == tokenize.DEDENT:
+                depth -= 1
+            elif tok.type in (tokenize.NL, tokenize.COMMENT, tokenize.ENCODING):
+                pass
+            elif tok.type == tokenize.NEWLINE:
+                at_line_start = True
+            elif tok.type == tokenize.ENDMARKER:
+                break
+            elif at_line_start:
+                at_line_start = False
+                if depth == 0:
+                    if has_statement and not in_decorator and tok.string not in continuation_keywords:
+                        yield pop_chunk(tok.start[0] - 1)
+                    in_decorator = tok.string == "@"
+                    has_statement = True
+
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        lines.extend(iter(readline, ""))
+
+    if "".join(lines).strip():
+        yield pop_chunk(first_lineno + len(lines) - 1)
@@ -1,5 +1,6 @@
 import unittest
 from pathlib import Path
+from types import MappingProxyType
 from textwrap import dedent
 import sys
 import tempfile
@@ -9,8 +10,8 @@ import io
 this_dir = Path(__file__).resolve().parent
 sys.path.insert(0, this_dir.parent.as_posix())
 
-from neval import flagged_dict
-from neval import neval, neval_file
+from neval import flagged_dict, _neval
+from neval import neval, neval_file, NevalExecutor, subinterpreters_supported
 
 FlaggedDict = flagged_dict.FlaggedDict
 
@@ -370,6 +371,51 @@ class TestRunCode(unittest.TestCase):
         self.assertEqual(result, 10)
         self.assertEqual(namespace["x"], 10)
 
+    def test_neval_frozen(self):
+        namespace_readonly = {"rate": 0.5, "limit": 10, "table": [1, 2]}
+        code = "(1 + rate) * limit + len(table)"
+
+        def cached_code_object():
+            return next(v[0] for k, v in _neval.specialized_code_cache.items() if k[0] == code and k[2] is True)
+
+        self.assertEqual(neval(code, {}, namespace_readonly, frozen=True), 17.0)
+        code_object = cached_code_object()
+        self.assertNotIn("rate", code_object.co_names)
+        self.assertNotIn("limit", code_object.co_names)
+        self.assertIn("table", code_object.co_names)
+
+        # The specialized code is reused as long as the frozen values are unchanged
+        self.assertEqual(neval(code, {}, namespace_readonly, frozen=True), 17.0)
+        self.assertIs(cached_code_object(), code_object)
+
+        self.assertEqual(neval(code, {}, namespace_readonly, frozen=["rate"]), 17.0)
+        neval(code, {}, namespace_readonly, frozen="rate")
+        self.assertEqual(
+            next(v[2] for k, v in _neval.specialized_code_cache.items() if k[0] == code and k[2] == {"rate"}),
+            {"rate": 0.5},
+        )
+
+        # Rebinding a frozen value invalidates the specialized code
+        namespace_readonly["rate"] = 1.5
+        self.assertEqual(neval(code, {}, namespace_readonly, frozen=True), 27.0)
+        self.assertIsNot(cached_code_object(), code_object)
+
+        # Names bound by the code itself are never inlined
+        self.assertEqual(
+            (2, {"limit": 2}),
+            (neval("limit = 2; limit", namespace := {}, {"limit": 10}, frozen=True), namespace),
+        )
+        self.assertEqual(neval("def f(rate): return rate\nf(3)", {}, namespace_readonly, frozen=True), 3)
+        if sys.version_info >= (3, 12):
+            self.assertEqual(
+                neval("def f[rate](): return rate\nf().__name__", {}, namespace_readonly, frozen=True), "rate"
+            )
+
+        # The cache is bounded
+        for i in range(_neval.specialized_code_cache_size + 10):
+            neval(f"rate + {i}", {}, namespace_readonly, frozen=True)
+        self.assertEqual(len(_neval.specialized_code_cache), _neval.specialized_code_cache_size)
+
     def test_neval_file_assign(self):
         with tempfile.TemporaryDirectory() as temp_dir_str:
             temp_file = Path(temp_dir_str, "file.py")
@@ -400,6 +446,161 @@ class TestRunCode(unittest.TestCase):
         expect = f"""File "{temp_file}", line 1, in <module>\n    xie837k76rlp56nv\nNameError: name 'xie837k76rlp56nv' is not defined"""
         self.assertEqual(got.strip(), expect.strip())
 
+    def test_neval_file_chunked(self):
+        with tempfile.TemporaryDirectory() as temp_dir_str:
+            temp_file = Path(temp_dir_str, "file.py")
+            temp_file.write_text(
+                dedent(
+                    """\
+                    @staticmethod
+                    def f(x):
+                        return x * 2
+
+                    if False:
+                        pass
+                    else:
+                        a = f.__func__(2)
+                    b = missing_name + 1
+                    b"""
+                )
+            )
+
+            namespace = {}
+            err = None
+            try:
+                neval_file(temp_file, namespace, chunked=True)
+            except NameError as e:
+                err = e
+
+            self.assertEqual(err.neval_resume_line, 9)
+            self.assertEqual(sorted(namespace), ["a", "f"])
+            if sys.version_info >= (3, 11):
+                self.assertEqual(err.__notes__, ["Error in file.py:\n----> 9 b = missing_name + 1"])
+
+            temp_file.write_text(temp_file.read_text().replace("missing_name", "a"))
+            result = neval_file(temp_file, namespace, chunked=True, resume_from_line=err.neval_resume_line)
+
+        self.assertEqual(result, 5)
+        self.assertEqual(namespace["b"], 5)
+
+    def test_neval_file_chunked_resume_future(self):
+        with tempfile.TemporaryDirectory() as temp_dir_str:
+            temp_file = Path(temp_dir_str, "file.py")
+            temp_file.write_text("from __future__ import annotations\na = 1\ndef f(x: Undefined): return x\nf(a)\n")
+
+            self.assertEqual(neval_file(temp_file, {"a": 1}, chunked=True, resume_from_line=3), 1)
+
+    def test_neval_file_chunked_docstring_and_future(self):
+        with tempfile.TemporaryDirectory() as temp_dir_str:
+            temp_file = Path(temp_dir_str, "file.py")
+
+            temp_file.write_text('"""doc"""\nx = 1\n"note"\ny = 2\n')
+            self.assertEqual(neval_file(temp_file, namespace := {}, chunked=True), None)
+            self.assertEqual(neval_file(temp_file, {}), None)
+            self.assertEqual(namespace, {"__doc__": "doc", "x": 1, "y": 2})
+
+            temp_file.write_text('x = 1\n"note"\ny = 2\n')
+            neval_file(temp_file, namespace := {}, chunked=True)
+            self.assertEqual(namespace, {"x": 1, "y": 2})
+
+            temp_file.write_text("x = 1\nfrom __future__ import annotations\n")
+            err = None
+            try:
+                neval_file(temp_file, namespace := {}, chunked=True)
+            except SyntaxError as e:
+                err = e
+
+        self.assertEqual((err.msg, err.lineno), ("from __future__ imports must occur at the beginning of the file", 2))
+        self.assertEqual(namespace, {"x": 1})
+
+    def test_neval_file_chunked_syntax_error(self):
+        with tempfile.TemporaryDirectory() as temp_dir_str:
+            temp_file = Path(temp_dir_str, "file.py")
+            temp_file.write_text("a = 1\nb = 2\nc d\n")
+
+            namespace = {}
+            err = None
+            try:
+                neval_file(temp_file, namespace, chunked=True)
+            except SyntaxError as e:
+                err = e
+
+        self.assertEqual((err.lineno, err.text), (3, "c d\n"))
+        self.assertEqual(namespace, {"a": 1, "b": 2})
+
+
+class TestNevalExecutor(unittest.TestCase):
+    def test_submit(self):
+        namespaces = [{"a": i, "unshareable": object()} for i in range(4)]
+        with NevalExecutor(max_workers=2) as executor:
+            futures = [executor.submit("b = a * c; del a; b", ns, {"c": 10}) for ns in namespaces]
+            results = [f.result() for f in futures]
+
+        self.assertEqual(results, [0, 10, 20, 30])
+        self.assertEqual([sorted(ns) for ns in namespaces], [["b", "unshareable"]] * 4)
+        self.assertEqual([ns["b"] for ns in namespaces], [0, 10, 20, 30])
+
+    def test_in_place_mutation(self):
+        namespace = {"xs": [1, 2], "d": {"a": 1}, "buf": bytearray(b"ab")}
+        with NevalExecutor(max_workers=1) as executor:
+            executor.submit("xs.append(3); d['b'] = 2; buf.append(99)", namespace).result()
+
+        self.assertEqual(namespace, {"xs": [1, 2, 3], "d": {"a": 1, "b": 2}, "buf": bytearray(b"abc")})
+
+    def test_buffers(self):
+        namespace = {"data": memoryview(b"abc")}
+        with NevalExecutor(max_workers=1) as executor:
+            self.assertEqual(executor.submit("data.upper()", namespace).result(), b"ABC")
+
+    def test_errors(self):
+        namespace = {"a": 1}
+        with NevalExecutor(max_workers=1) as executor:
+            self.assertRaises(ZeroDivisionError, lambda: executor.submit("b = 2; 1/0", namespace).result())
+            self.assertEqual(namespace, {"a": 1, "b": 2})
+
+            self.assertRaises(TypeError, lambda: executor.submit("c = 3; object()", namespace).result())
+            self.assertEqual(namespace, {"a": 1, "b": 2, "c": 3})
+
+            future = executor.submit("a = 1", MappingProxyType({}))
+            self.assertRaises(AttributeError, lambda: future.result(timeout=10))
+
+    def test_unpicklable_errors(self):
+        namespace = {"a": 1}
+        with NevalExecutor(max_workers=1) as executor:
+            future = executor.submit("class MyErr(Exception): pass\nb = 2\nraise MyErr('oops')", namespace)
+            self.assertRaisesRegex(RuntimeError, "MyErr: oops", future.result)
+
+        self.assertEqual(namespace, {"a": 1, "b": 2})
+
+    def test_concurrent_errors(self):
+        with NevalExecutor(max_workers=4) as executor:
+            futures = [executor.submit(f"{i}/0", traceback_file_output=True) for i in range(400)]
+            for future in futures:
+                self.assertRaises(ZeroDivisionError, future.result)
+
+    def test_subclasses(self):
+        from collections import namedtuple
+        from enum import IntEnum
+
+        Color = IntEnum("Color", "RED")
+        Point = namedtuple("Point", "x y")
+
+        namespace = {"color": Color.RED, "point": Point(1, 2), "name": type("Name", (str,), {})("x")}
+        with NevalExecutor(max_workers=1) as executor:
+            code = "type(color).__name__, type(point).__name__, type(name).__name__"
+            result = executor.submit(code, namespace).result()
+
+        self.assertEqual(result, ("int", "tuple", "str"))
+
+    @unittest.skipUnless(subinterpreters_supported(), "Requires subinterpreter support")
+    def test_subinterpreters(self):
+        namespace = {"a": 1}
+        with NevalExecutor(max_workers=2) as executor:
+            self.assertTrue(executor.isolated_by_subinterpreters)
+            self.assertEqual(executor.submit("a += 1; a", namespace).result(), 2)
+
+        self.assertEqual(namespace, {"a": 2})
+
 
 if __name__ == "__main__":
     unittest.main()